@@ -5,17 +5,30 @@ A web application for managing tasks with an integrated Pomodoro timer.
 """
 
 import os
-from datetime import datetime, date, timedelta
+import tempfile
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import (
+    Flask, render_template, request, redirect, url_for, session, flash,
+    jsonify, get_flashed_messages, abort, g
+)
+from flask_wtf.csrf import generate_csrf
+import jinja2
+from sqlalchemy import bindparam, event, lambda_stmt, select
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
 from dotenv import load_dotenv
 
-from models import db, User, Task, Pomodoro
+from models import db, User, Task, Pomodoro, PRIORITY_LABELS, PRIORITY_VALUES
 from helpers import login_required
 
+# scrypt is memory-hard and cheaper per unit of attack resistance than
+# Werkzeug's default PBKDF2; check_password_hash still verifies old
+# PBKDF2 hashes, which get upgraded on the next successful login.
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -25,11 +38,39 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-i
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///pomodoro.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Keep a sized pool of warm connections instead of SQLAlchemy's minimal
+# SQLite defaults; check_same_thread=False is safe because SQLAlchemy
+# serializes access to each pooled connection.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    'connect_args': {'check_same_thread': False, 'timeout': 30},
+}
+
 # Secure session cookie configuration
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FORCE_HTTPS', 'False').lower() == 'true'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# Size the compiled-template cache well above the template count and keep
+# Jinja's constant-folding optimizer on (must be set before the lazily
+# created jinja_env is first touched)
+app.jinja_options = {**app.jinja_options, 'cache_size': 1000, 'optimized': True}
+
+# Production template settings: skip the stat() per render that template
+# auto-reload costs, and persist compiled templates across restarts
+if not app.debug:
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    _jinja_cache_dir = os.path.join(tempfile.gettempdir(), 'pomodoro_jinja_cache')
+    os.makedirs(_jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(_jinja_cache_dir)
+
+# Templates render priorities through the shared label mapping
+app.jinja_env.globals['PRIORITY_LABELS'] = PRIORITY_LABELS
+
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
@@ -51,15 +92,71 @@ Talisman(
 # Initialize database
 db.init_app(app)
 
-# Create tables on first run
+# Create tables on first run and tune SQLite for concurrent use
 with app.app_context():
+
+    @event.listens_for(db.engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL and relaxed fsync on every new SQLite connection.
+
+        WAL lets readers proceed while a write is in flight, and
+        synchronous=NORMAL cuts the per-commit fsync cost, which matters
+        for the write-heavy pomodoro start/complete endpoints.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=134217728')
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
     db.create_all()
 
 
+@app.before_request
+def prime_csrf_token():
+    """Generate the CSRF token once per request and stash it on g.
+
+    Templates with many forms (e.g. one toggle/delete form per task row)
+    can use {{ g.csrf_token }} instead of calling csrf_token() per form,
+    so the token is looked up from the session only once per request.
+    """
+    g.csrf_token = generate_csrf()
+
+
 # =============================================================================
 # Authentication Routes
 # =============================================================================
 
+# Marker swapped for the real per-session CSRF token on each cached render
+_CSRF_PLACEHOLDER = '__CSRF_TOKEN_PLACEHOLDER__'
+
+
+@lru_cache(maxsize=16)
+def _cached_template_html(template_name):
+    """Render a user-independent template once and cache the HTML.
+
+    The session's CSRF token is replaced with a placeholder before
+    caching so the cached copy carries no session-specific data.
+    """
+    token = generate_csrf()
+    return render_template(template_name).replace(token, _CSRF_PLACEHOLDER)
+
+
+def render_static_page(template_name):
+    """Serve a cached render of a template with no per-user content.
+
+    Falls back to a normal render when flashed messages are pending,
+    since those vary per request. Saves the full Jinja render pass for
+    anonymous GETs of the login and register pages.
+    """
+    if get_flashed_messages():
+        return render_template(template_name)
+    return _cached_template_html(template_name).replace(
+        _CSRF_PLACEHOLDER, generate_csrf()
+    )
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     """Handle user registration."""
@@ -94,7 +191,7 @@ def register():
         # Create new user
         new_user = User(
             username=username,
-            password_hash=generate_password_hash(password)
+            password_hash=generate_password_hash(password, method=PASSWORD_HASH_METHOD)
         )
         db.session.add(new_user)
         db.session.commit()
@@ -102,7 +199,7 @@ def register():
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
 
-    return render_template('register.html')
+    return render_static_page('register.html')
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -124,12 +221,17 @@ def login():
             flash('Invalid username or password.', 'error')
             return render_template('login.html')
 
+        # Upgrade legacy PBKDF2 hashes now that we have the plaintext
+        if user.password_hash.startswith('pbkdf2'):
+            user.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+            db.session.commit()
+
         session['user_id'] = user.id
         session['username'] = user.username
         flash(f'Welcome back, {user.username}!', 'success')
         return redirect(url_for('index'))
 
-    return render_template('login.html')
+    return render_static_page('login.html')
 
 
 @app.route('/logout')
@@ -144,6 +246,17 @@ def logout():
 # Main Routes
 # =============================================================================
 
+# lambda_stmt caches the compiled SQL across requests; only the bound
+# user id changes per execution, so Core skips statement compilation
+# on every dashboard hit. The dropdown only shows id/title (plus sort
+# keys), so selecting those columns skips fetching description TEXT and
+# full ORM hydration.
+_PENDING_TASKS_STMT = lambda_stmt(
+    lambda: select(Task.id, Task.title, Task.priority, Task.deadline)
+    .where(Task.user_id == bindparam('uid'), Task.completed == False)
+    .order_by(Task.deadline.asc().nullslast(), Task.priority.desc())
+)
+
 @app.route('/')
 @login_required
 def index():
@@ -151,24 +264,33 @@ def index():
     user_id = session['user_id']
 
     # Get pending tasks for the timer dropdown
-    pending_tasks = Task.query.filter_by(
-        user_id=user_id,
-        completed=False
-    ).order_by(Task.deadline.asc().nullslast(), Task.priority.desc()).all()
+    pending_tasks = db.session.execute(
+        _PENDING_TASKS_STMT, {'uid': user_id}
+    ).all()
 
-    # Get today's stats
+    # Get today's stats: both counts as scalar subqueries in one roundtrip.
+    # Range predicates on the datetime columns keep the queries sargable.
     today = date.today()
-    today_pomodoros = Pomodoro.query.filter(
+    day_start = datetime.combine(today, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    pomodoro_count = db.session.query(db.func.count(Pomodoro.id)).filter(
         Pomodoro.user_id == user_id,
         Pomodoro.completed == True,
-        db.func.date(Pomodoro.started_at) == today
-    ).count()
+        Pomodoro.started_at >= day_start,
+        Pomodoro.started_at < day_end
+    ).scalar_subquery()
 
-    today_tasks_completed = Task.query.filter(
+    task_count = db.session.query(db.func.count(Task.id)).filter(
         Task.user_id == user_id,
         Task.completed == True,
-        db.func.date(Task.created_at) == today
-    ).count()
+        Task.created_at >= day_start,
+        Task.created_at < day_end
+    ).scalar_subquery()
+
+    today_pomodoros, today_tasks_completed = db.session.query(
+        pomodoro_count, task_count
+    ).one()
 
     return render_template(
         'index.html',
@@ -201,9 +323,9 @@ def tasks():
     elif status_filter == 'completed':
         query = query.filter_by(completed=True)
 
-    # Apply priority filter
-    if priority_filter != 'all':
-        query = query.filter_by(priority=priority_filter)
+    # Apply priority filter (form labels map to the stored integers)
+    if priority_filter in PRIORITY_VALUES:
+        query = query.filter_by(priority=PRIORITY_VALUES[priority_filter])
 
     # Order by deadline (nulls last) then by priority
     tasks_list = query.order_by(
@@ -212,11 +334,14 @@ def tasks():
         Task.created_at.desc()
     ).all()
 
+    # Passing url_for in the context lets the per-row loops in the
+    # template bind it as a local instead of a global lookup per call
     return render_template(
         'tasks.html',
         tasks=tasks_list,
         status_filter=status_filter,
-        priority_filter=priority_filter
+        priority_filter=priority_filter,
+        url_for=url_for
     )
 
 
@@ -227,7 +352,7 @@ def add_task():
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
         description = request.form.get('description', '').strip()
-        priority = request.form.get('priority', 'medium')
+        priority = PRIORITY_VALUES.get(request.form.get('priority', 'medium'), 2)
         deadline_str = request.form.get('deadline', '')
 
         if not title:
@@ -267,7 +392,7 @@ def edit_task(task_id):
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
         description = request.form.get('description', '').strip()
-        priority = request.form.get('priority', 'medium')
+        priority = PRIORITY_VALUES.get(request.form.get('priority', 'medium'), 2)
         deadline_str = request.form.get('deadline', '')
 
         if not title:
@@ -298,11 +423,20 @@ def edit_task(task_id):
 @login_required
 def toggle_task(task_id):
     """Toggle task completion status."""
-    task = Task.query.filter_by(id=task_id, user_id=session['user_id']).first_or_404()
-    task.completed = not task.completed
+    # Single UPDATE with the ownership check in the WHERE clause instead
+    # of SELECT-then-UPDATE; RETURNING gives us the new status for the flash
+    row = db.session.execute(
+        db.update(Task)
+        .where(Task.id == task_id, Task.user_id == session['user_id'])
+        .values(completed=~Task.completed)
+        .returning(Task.completed)
+    ).first()
     db.session.commit()
 
-    status = 'completed' if task.completed else 'pending'
+    if row is None:
+        abort(404)
+
+    status = 'completed' if row.completed else 'pending'
     flash(f'Task marked as {status}.', 'success')
     return redirect(request.referrer or url_for('tasks'))
 
@@ -311,10 +445,21 @@ def toggle_task(task_id):
 @login_required
 def delete_task(task_id):
     """Delete a task."""
-    task = Task.query.filter_by(id=task_id, user_id=session['user_id']).first_or_404()
-    db.session.delete(task)
+    # Detach any pomodoros first (the FK has no ON DELETE action), then
+    # delete with the ownership check in the WHERE clause
+    db.session.execute(
+        db.update(Pomodoro)
+        .where(Pomodoro.task_id == task_id, Pomodoro.user_id == session['user_id'])
+        .values(task_id=None)
+    )
+    result = db.session.execute(
+        db.delete(Task).where(Task.id == task_id, Task.user_id == session['user_id'])
+    )
     db.session.commit()
 
+    if result.rowcount == 0:
+        abort(404)
+
     flash('Task deleted.', 'success')
     return redirect(url_for('tasks'))
 
@@ -330,12 +475,15 @@ def start_pomodoro():
     task_id = request.form.get('task_id')
     duration = request.form.get('duration', 25, type=int)
 
-    # Validate task belongs to user if provided
+    # Validate task belongs to user if provided; an id-only existence
+    # check avoids hydrating a Task instance we never use
     if task_id:
-        task = Task.query.filter_by(id=task_id, user_id=session['user_id']).first()
-        if not task:
+        exists = db.session.query(Task.id).filter_by(
+            id=task_id, user_id=session['user_id']
+        ).limit(1).scalar()
+        if exists is None:
             return jsonify({'error': 'Invalid task'}), 400
-        task_id = task.id
+        task_id = exists
     else:
         task_id = None
 
@@ -355,14 +503,16 @@ def start_pomodoro():
 @login_required
 def complete_pomodoro(pomodoro_id):
     """Mark a pomodoro session as completed."""
-    pomodoro = Pomodoro.query.filter_by(
-        id=pomodoro_id,
-        user_id=session['user_id']
-    ).first_or_404()
-
-    pomodoro.completed = True
+    result = db.session.execute(
+        db.update(Pomodoro)
+        .where(Pomodoro.id == pomodoro_id, Pomodoro.user_id == session['user_id'])
+        .values(completed=True)
+    )
     db.session.commit()
 
+    if result.rowcount == 0:
+        abort(404)
+
     return jsonify({'success': True})
 
 
@@ -370,6 +520,30 @@ def complete_pomodoro(pomodoro_id):
 # Statistics Routes
 # =============================================================================
 
+def _daily_stats(user_id, today, label_format='%a'):
+    """
+    Build the 7-day chart data for a user in a single query.
+
+    Computes the day window once, fetches all daily completed-pomodoro
+    counts with one GROUP BY query, and returns the chart-ready list of
+    {'date', 'count'} dicts with missing days filled with zero.
+    """
+    days = tuple(today - timedelta(days=6 - i) for i in range(7))
+    window_start = datetime.combine(days[0], time.min)
+    rows = db.session.query(
+        db.func.date(Pomodoro.started_at).label('d'),
+        db.func.count().label('c')
+    ).filter(
+        Pomodoro.user_id == user_id,
+        Pomodoro.completed == True,
+        Pomodoro.started_at >= window_start
+    ).group_by('d').all()
+    counts = {row.d: row.c for row in rows}
+    return [
+        {'date': day.strftime(label_format), 'count': counts.get(str(day), 0)}
+        for day in days
+    ]
+
 @app.route('/stats')
 @login_required
 def stats():
@@ -377,55 +551,52 @@ def stats():
     user_id = session['user_id']
     today = date.today()
 
-    # Today's stats
+    # Today's stats (range predicate keeps the started_at index usable)
+    day_start = datetime.combine(today, time.min)
+    day_end = day_start + timedelta(days=1)
     today_pomodoros = Pomodoro.query.filter(
         Pomodoro.user_id == user_id,
         Pomodoro.completed == True,
-        db.func.date(Pomodoro.started_at) == today
+        Pomodoro.started_at >= day_start,
+        Pomodoro.started_at < day_end
     ).count()
 
-    # This week's stats (last 7 days)
-    week_ago = today - timedelta(days=7)
-    week_pomodoros = Pomodoro.query.filter(
+    # This week's stats (last 7 days): count and total focus time in one
+    # aggregate query instead of loading every row just to sum durations
+    week_start = datetime.combine(today - timedelta(days=7), time.min)
+    week_count, total_focus_minutes = db.session.query(
+        db.func.count(Pomodoro.id),
+        db.func.coalesce(db.func.sum(Pomodoro.duration), 0)
+    ).filter(
         Pomodoro.user_id == user_id,
         Pomodoro.completed == True,
-        db.func.date(Pomodoro.started_at) >= week_ago
-    ).all()
+        Pomodoro.started_at >= week_start
+    ).one()
 
-    # Calculate total focus time this week
-    total_focus_minutes = sum(p.duration for p in week_pomodoros)
     total_focus_hours = total_focus_minutes // 60
     total_focus_remaining_minutes = total_focus_minutes % 60
 
-    # Daily breakdown for chart
-    daily_stats = []
-    for i in range(7):
-        day = today - timedelta(days=6-i)
-        count = Pomodoro.query.filter(
-            Pomodoro.user_id == user_id,
-            Pomodoro.completed == True,
-            db.func.date(Pomodoro.started_at) == day
-        ).count()
-        daily_stats.append({
-            'date': day.strftime('%a'),
-            'count': count
-        })
-
-    # Task stats
-    total_tasks = Task.query.filter_by(user_id=user_id).count()
-    completed_tasks = Task.query.filter_by(user_id=user_id, completed=True).count()
+    # Daily breakdown for chart (one grouped query instead of 7 counts)
+    daily_stats = _daily_stats(user_id, today)
+
+    # Task stats: total and completed in one conditional-aggregate scan
+    total_tasks, completed_tasks = db.session.query(
+        db.func.count(Task.id),
+        db.func.coalesce(db.func.sum(db.case((Task.completed, 1), else_=0)), 0)
+    ).filter(Task.user_id == user_id).one()
     pending_tasks = total_tasks - completed_tasks
 
     return render_template(
         'stats.html',
         today_pomodoros=today_pomodoros,
-        week_pomodoros=len(week_pomodoros),
+        week_pomodoros=week_count,
         total_focus_hours=total_focus_hours,
         total_focus_minutes=total_focus_remaining_minutes,
         daily_stats=daily_stats,
         total_tasks=total_tasks,
         completed_tasks=completed_tasks,
-        pending_tasks=pending_tasks
+        pending_tasks=pending_tasks,
+        url_for=url_for
     )
 
 
@@ -436,18 +607,7 @@ def api_weekly_stats():
     user_id = session['user_id']
     today = date.today()
 
-    daily_stats = []
-    for i in range(7):
-        day = today - timedelta(days=6-i)
-        count = Pomodoro.query.filter(
-            Pomodoro.user_id == user_id,
-            Pomodoro.completed == True,
-            db.func.date(Pomodoro.started_at) == day
-        ).count()
-        daily_stats.append({
-            'date': day.strftime('%a %d'),
-            'count': count
-        })
+    daily_stats = _daily_stats(user_id, today, label_format='%a %d')
 
     return jsonify(daily_stats)
 
@@ -0,0 +1,15 @@
+"""
+ASGI entry point for the Pomodoro Task Manager.
+
+Wraps the Flask WSGI app so it can be served by an ASGI server such as
+Uvicorn, which handles many concurrent I/O-bound requests with an event
+loop instead of one thread per request:
+
+    uvicorn asgi:asgi_app --workers 1 --loop uvloop
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+asgi_app = WsgiToAsgi(app)
@@ -5,13 +5,20 @@ This module contains utility functions like login_required decorator.
 """
 
 from functools import wraps
-from flask import redirect, session, url_for
+from flask import g, redirect, session, url_for
+
+from models import db, User
 
 
 def login_required(f):
     """
     Decorator to require login for routes.
 
+    Also loads the current user onto g.user for the request lifetime, so
+    views and templates read it from there instead of re-querying.
+    db.session.get() hits the identity map, so repeated lookups within a
+    request are dict-cheap.
+
     Args:
         f: The function to wrap.
 
@@ -22,5 +29,10 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if session.get('user_id') is None:
             return redirect(url_for('login'))
+        g.user = db.session.get(User, session['user_id'])
+        if g.user is None:
+            # Stale session pointing at a deleted user
+            session.clear()
+            return redirect(url_for('login'))
         return f(*args, **kwargs)
     return decorated_function
@@ -9,6 +9,11 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+# Task priority is stored as a small integer so that ordering by priority
+# is correct (strings sort 'high' < 'low' < 'medium') and index-friendly.
+PRIORITY_LABELS = {1: 'low', 2: 'medium', 3: 'high'}
+PRIORITY_VALUES = {label: value for value, label in PRIORITY_LABELS.items()}
+
 
 class User(db.Model):
     """User model for authentication."""
@@ -20,9 +25,15 @@ class User(db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Relationships
-    tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
-    pomodoros = db.relationship('Pomodoro', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Relationships: lazy='raise' turns an accidental lazy load of a whole
+    # collection into an error instead of a silent N+1; load them explicitly
+    # with selectinload() where they are actually needed.
+    tasks = db.relationship(
+        'Task', back_populates='user', lazy='raise', cascade='all, delete-orphan'
+    )
+    pomodoros = db.relationship(
+        'Pomodoro', back_populates='user', lazy='raise', cascade='all, delete-orphan'
+    )
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -32,18 +43,28 @@ class Task(db.Model):
     """Task model for todo items."""
 
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_task_user_completed_deadline', 'user_id', 'completed', 'deadline'),
+        db.Index('ix_task_user_completed_created', 'user_id', 'completed', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    priority = db.Column(db.String(10), default='medium')  # low, medium, high
+    priority = db.Column(db.SmallInteger, default=2, index=True)  # see PRIORITY_LABELS
     deadline = db.Column(db.Date)
     completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
-    pomodoros = db.relationship('Pomodoro', backref='task', lazy=True)
+    user = db.relationship('User', back_populates='tasks')
+    pomodoros = db.relationship('Pomodoro', back_populates='task', lazy='select')
+
+    @property
+    def priority_label(self):
+        """Human-readable priority name for templates."""
+        return PRIORITY_LABELS.get(self.priority, 'medium')
 
     def __repr__(self):
         return f'<Task {self.title}>'
@@ -53,6 +74,9 @@ class Pomodoro(db.Model):
     """Pomodoro session model."""
 
     __tablename__ = 'pomodoros'
+    __table_args__ = (
+        db.Index('ix_pom_user_completed_started', 'user_id', 'completed', 'started_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -61,5 +85,9 @@ class Pomodoro(db.Model):
     completed = db.Column(db.Boolean, default=False)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Relationships
+    user = db.relationship('User', back_populates='pomodoros')
+    task = db.relationship('Task', back_populates='pomodoros')
+
     def __repr__(self):
         return f'<Pomodoro {self.id} - {self.duration}min>'
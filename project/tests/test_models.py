@@ -78,7 +78,7 @@ class TestTaskModel:
                 user_id=sample_user,
                 title='Test Task',
                 description='A test task',
-                priority='high'
+                priority=3
             )
             db.session.add(task)
             db.session.commit()
@@ -97,7 +97,8 @@ class TestTaskModel:
             db.session.add(task)
             db.session.commit()
 
-            assert task.priority == 'medium'
+            assert task.priority == 2
+            assert task.priority_label == 'medium'
 
     def test_task_with_deadline(self, client, sample_user):
         """Test task with deadline."""